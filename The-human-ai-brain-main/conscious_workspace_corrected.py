@@ -18,10 +18,40 @@ Mathematical Foundation:
 """
 
 import numpy as np
-from scipy.linalg import logm, sqrtm
+from scipy.linalg import eigh
 from typing import Tuple, Optional
 import warnings
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; the NumPy path is used instead
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _pure_metrics_nb(psi: np.ndarray, n_A: int, n_B: int,
+                         epsilon: float) -> Tuple[float, float]:
+        """
+        Compiled (S(ρ_A), Φ_Q) of a pure state from its Schmidt coefficients.
+        
+        At n ≤ 16 the NumPy path is dominated by per-call dispatch overhead,
+        which matters when update_state runs in a tight simulation loop.
+        """
+        _, schmidt, _ = np.linalg.svd(psi.reshape((n_A, n_B)), full_matrices=False)
+        p = schmidt * schmidt
+        total = p.sum()
+        
+        S_A = 0.0
+        for k in range(p.shape[0]):
+            w = min(max(p[k] / total, epsilon), 1.0)
+            S_A -= w * np.log(w)
+            
+        return S_A, 2.0 * S_A
+else:
+    _pure_metrics_nb = None
+
+
 class CorrectedConsciousWorkspace:
     def __init__(self, 
                  total_dimension: int = 7,
@@ -53,18 +83,101 @@ class CorrectedConsciousWorkspace:
         self.n_B = subsystem_B_dim
         self.entropy_threshold = entropy_threshold
         self.max_entropy = np.log(self.n)
+        self._collapse_threshold_value = self.entropy_threshold * self.max_entropy
         
-        # Initialize qualia basis (orthonormal)
-        self.qualia_basis = self._initialize_basis()
+        # Fixed (n_A, n_B, n_A, n_B) view used by the partial traces
+        self._tensor_shape = (self.n_A, self.n_B, self.n_A, self.n_B)
+        
+        # Qualia basis (orthonormal), drawn on first access
+        self._qualia_basis = None
         
         # Initialize state in maximally mixed state
         self.state_vector = np.ones(self.n) / np.sqrt(self.n)
-        self.density_matrix = self._state_to_density(self.state_vector)
+        self._density_matrix = None  # Built lazily from state_vector
+        self._is_pure = True
+        self._current_entropy = None  # S(ρ) of the current state, once known
         
-        # Tracking
+        # Tracking (Python lists until reserve() preallocates arrays)
         self.collapse_count = 0
-        self.entropy_history = []
-        self.phi_q_history = []
+        self._entropy_list = []
+        self._phi_q_list = []
+        self._entropy_arr = None
+        self._phi_q_arr = None
+        self._history_idx = 0
+        
+    @property
+    def density_matrix(self) -> np.ndarray:
+        """Current density matrix ρ_AB, formed from the state vector on first use."""
+        if self._density_matrix is None:
+            self._density_matrix = self._state_to_density(self.state_vector)
+        return self._density_matrix
+    
+    @density_matrix.setter
+    def density_matrix(self, rho: np.ndarray):
+        # Externally assigned states may be mixed
+        self._density_matrix = rho
+        self._is_pure = False
+        self._current_entropy = None
+        
+    @property
+    def qualia_basis(self) -> np.ndarray:
+        """Orthonormal qualia basis (rows), initialized on first use."""
+        if self._qualia_basis is None:
+            self._qualia_basis = self._initialize_basis()
+        return self._qualia_basis
+    
+    @qualia_basis.setter
+    def qualia_basis(self, basis: np.ndarray):
+        self._qualia_basis = basis
+        
+    @property
+    def entropy_history(self):
+        """Entropy after each update_state call (array view once reserved)."""
+        if self._entropy_arr is not None:
+            return self._entropy_arr[:self._history_idx]
+        return self._entropy_list
+    
+    @property
+    def phi_q_history(self):
+        """Φ_Q after each update_state call (array view once reserved)."""
+        if self._phi_q_arr is not None:
+            return self._phi_q_arr[:self._history_idx]
+        return self._phi_q_list
+    
+    def reserve(self, steps: int):
+        """
+        Preallocate metric history for the next `steps` calls to update_state.
+        
+        Long simulations then write into NumPy arrays instead of appending to
+        Python lists. History recorded so far is carried over.
+        
+        Args:
+            steps: Number of further updates to make room for
+        """
+        n_recorded = len(self.entropy_history)
+        entropy_arr = np.empty(n_recorded + steps)
+        phi_q_arr = np.empty(n_recorded + steps)
+        entropy_arr[:n_recorded] = self.entropy_history
+        phi_q_arr[:n_recorded] = self.phi_q_history
+        
+        self._entropy_arr = entropy_arr
+        self._phi_q_arr = phi_q_arr
+        self._history_idx = n_recorded
+        
+    def _record_metrics(self, entropy: float, phi_q: float):
+        """Append one step to the metric history."""
+        if self._entropy_arr is None:
+            self._entropy_list.append(entropy)
+            self._phi_q_list.append(phi_q)
+            return
+            
+        if self._history_idx == len(self._entropy_arr):
+            # Reserved room exhausted: grow geometrically
+            self.reserve(max(self._history_idx, 1))
+            
+        self._entropy_arr[self._history_idx] = entropy
+        self._phi_q_arr[self._history_idx] = phi_q
+        self._history_idx += 1
         
     def _initialize_basis(self) -> np.ndarray:
         """Initialize orthonormal qualia basis using random unitary."""
@@ -90,8 +203,27 @@ class CorrectedConsciousWorkspace:
         """Ensure matrix is Hermitian (ρ = ρ†) for numerical stability."""
         return (matrix + matrix.conj().T) / 2
     
-    def _ensure_positive_semidefinite(self, matrix: np.ndarray, epsilon: float = 1e-10) -> np.ndarray:
-        """Ensure matrix is positive semidefinite by eigenvalue clipping."""
+    def _ensure_positive_semidefinite(self, matrix: np.ndarray, epsilon: float = 1e-10,
+                                      max_attempts: int = 20) -> np.ndarray:
+        """
+        Ensure matrix is positive definite via Cholesky with diagonal jitter.
+        
+        Nearly-PSD inputs (the common case) pass the Cholesky test directly or
+        after a tiny shift ε·I (doubled on each failure), avoiding an
+        eigendecomposition and two matmuls. The number of doublings is bounded
+        so the shift stays small; inputs that remain indefinite fall back to
+        eigenvalue clipping.
+        """
+        shifted = matrix
+        jitter = epsilon
+        for _ in range(max_attempts):
+            try:
+                np.linalg.cholesky(shifted)
+                return shifted
+            except np.linalg.LinAlgError:
+                shifted = matrix + jitter * np.eye(matrix.shape[0])
+                jitter *= 2
+                
         eigenvalues, eigenvectors = np.linalg.eigh(matrix)
         eigenvalues = np.maximum(eigenvalues, epsilon)  # Clip negative eigenvalues
         return eigenvectors @ np.diag(eigenvalues) @ eigenvectors.conj().T
@@ -134,15 +266,21 @@ class CorrectedConsciousWorkspace:
         Returns:
             rho_A: Reduced density matrix in H_A
         """
+        # Trivial factorizations: nothing to trace out, or nothing left
+        if self.n_B == 1:
+            return rho_AB
+        if self.n_A == 1:
+            return np.array([[np.trace(rho_AB)]])
+            
         # Reshape to tensor form: (n_A, n_B, n_A, n_B)
-        rho_tensor = rho_AB.reshape(self.n_A, self.n_B, self.n_A, self.n_B)
+        rho_tensor = rho_AB.reshape(self._tensor_shape)
         
         # Partial trace: sum over B indices (axes 1 and 3)
         # This implements: ρ_A[i,k] = Σ_j ρ_AB[i,j,k,j]
-        rho_A = np.einsum('ijkj->ik', rho_tensor)
+        rho_A = np.trace(rho_tensor, axis1=1, axis2=3)
         
-        # Regularize result
-        rho_A = self._regularize_density_matrix(rho_A)
+        # Partial trace of a PSD matrix is PSD; only restore exact Hermiticity
+        rho_A = self._ensure_hermitian(rho_A)
         
         return rho_A
     
@@ -164,42 +302,89 @@ class CorrectedConsciousWorkspace:
         Returns:
             rho_B: Reduced density matrix in H_B
         """
+        # Trivial factorizations: nothing to trace out, or nothing left
+        if self.n_A == 1:
+            return rho_AB
+        if self.n_B == 1:
+            return np.array([[np.trace(rho_AB)]])
+            
         # Reshape to tensor form: (n_A, n_B, n_A, n_B)
-        rho_tensor = rho_AB.reshape(self.n_A, self.n_B, self.n_A, self.n_B)
+        rho_tensor = rho_AB.reshape(self._tensor_shape)
         
         # Partial trace: sum over A indices (axes 0 and 2)
         # This implements: ρ_B[j,l] = Σ_i ρ_AB[i,j,i,l]
-        rho_B = np.einsum('ijil->jl', rho_tensor)
+        rho_B = np.trace(rho_tensor, axis1=0, axis2=2)
         
-        # Regularize result
-        rho_B = self._regularize_density_matrix(rho_B)
+        # Partial trace of a PSD matrix is PSD; only restore exact Hermiticity
+        rho_B = self._ensure_hermitian(rho_B)
         
         return rho_B
     
-    def von_neumann_entropy(self, rho: np.ndarray, epsilon: float = 1e-12) -> float:
+    def von_neumann_entropy(self, rho: Optional[np.ndarray] = None, epsilon: float = 1e-12) -> float:
         """
         Compute von Neumann entropy: S(ρ) = -Tr(ρ log ρ)
         
         Args:
-            rho: Density matrix
+            rho: Density matrix (uses current state if None)
             epsilon: Regularization to avoid log(0)
             
         Returns:
             Entropy in nats (natural units)
         """
-        # Regularize density matrix
-        rho = self._regularize_density_matrix(rho)
+        if rho is None:
+            if self._is_pure:
+                # ρ = |ψ⟩⟨ψ| has a single unit eigenvalue
+                return 0.0
+            rho = self.density_matrix
+            
+        # Get eigenvalues (more stable than matrix logarithm); clipping and
+        # normalizing the spectrum replaces a separate regularization pass
+        # (the symmetrized copy is scratch, so LAPACK may overwrite it)
+        eigenvalues = eigh(self._ensure_hermitian(rho), eigvals_only=True,
+                           driver='evr', overwrite_a=True, check_finite=False)
+        # Clipping to [ε, 1] makes every term -λ log λ non-negative
+        eigenvalues = np.clip(eigenvalues / np.sum(eigenvalues), epsilon, 1.0)
         
-        # Get eigenvalues (more stable than matrix logarithm)
-        eigenvalues = np.linalg.eigvalsh(rho)
+        # Compute entropy: S = -Σ λ_i log(λ_i)
+        return float(-np.dot(eigenvalues, np.log(eigenvalues)))
+    
+    def _entanglement_entropy(self, psi: np.ndarray, epsilon: float = 1e-12) -> float:
+        """
+        Compute entanglement entropy S(ρ_A) = S(ρ_B) of a pure state |ψ⟩.
         
-        # Filter out numerical zeros
-        eigenvalues = eigenvalues[eigenvalues > epsilon]
+        The singular values of ψ reshaped to (n_A, n_B) are its Schmidt
+        coefficients, so neither ρ_AB nor the partial traces are formed.
         
-        # Compute entropy: S = -Σ λ_i log(λ_i)
-        entropy = -np.sum(eigenvalues * np.log(eigenvalues + epsilon))
+        Args:
+            psi: State vector in H_A ⊗ H_B
+            epsilon: Threshold for numerical zeros
+            
+        Returns:
+            Entanglement entropy in nats
+        """
+        schmidt = np.linalg.svd(psi.reshape(self.n_A, self.n_B), compute_uv=False)
+        p = schmidt**2
+        p = np.clip(p / np.sum(p), epsilon, 1.0)
+        
+        return float(-np.dot(p, np.log(p)))
+    
+    def _pure_state_metrics(self, psi: np.ndarray) -> Tuple[float, float, float]:
+        """
+        Compute all tracked metrics of a pure state from one Schmidt decomposition.
         
-        return max(0.0, entropy)  # Ensure non-negative
+        Args:
+            psi: Normalized state vector in H_A ⊗ H_B
+            
+        Returns:
+            (S(ρ_AB), S(ρ_A), Φ_Q) in nats, with S(ρ_AB) = 0 and Φ_Q = 2·S(ρ_A)
+        """
+        if _pure_metrics_nb is not None:
+            psi = np.ascontiguousarray(psi, dtype=np.complex128)
+            S_A, phi_q = _pure_metrics_nb(psi, self.n_A, self.n_B, 1e-12)
+            return 0.0, S_A, phi_q
+            
+        S_A = self._entanglement_entropy(psi)
+        return 0.0, S_A, 2.0 * S_A
     
     def quantum_mutual_information(self, rho_AB: Optional[np.ndarray] = None) -> float:
         """
@@ -220,8 +405,26 @@ class CorrectedConsciousWorkspace:
             Quantum mutual information in nats
         """
         if rho_AB is None:
+            if self._is_pure:
+                # Pure state: S(ρ_AB) = 0 and S(ρ_A) = S(ρ_B)
+                return self._pure_state_metrics(self.state_vector)[2]
             rho_AB = self.density_matrix
             
+        return self._compute_all_metrics(rho_AB)[3]
+    
+    def _compute_all_metrics(self, rho_AB: np.ndarray) -> Tuple[float, float, float, float]:
+        """
+        Compute S(ρ_AB), S(ρ_A), S(ρ_B) and I(A:B) of a (possibly mixed) state.
+        
+        One regularization, one partial-trace pair and three eigenvalue
+        computations are shared across all four quantities.
+        
+        Args:
+            rho_AB: Full density matrix in H_A ⊗ H_B
+            
+        Returns:
+            (S_AB, S_A, S_B, I_AB) in nats
+        """
         # Regularize full density matrix
         rho_AB = self._regularize_density_matrix(rho_AB)
         
@@ -234,13 +437,10 @@ class CorrectedConsciousWorkspace:
         S_B = self.von_neumann_entropy(rho_B)
         S_AB = self.von_neumann_entropy(rho_AB)
         
-        # Quantum mutual information
-        I_AB = S_A + S_B - S_AB
+        # Quantum mutual information, non-negative up to round-off
+        I_AB = max(0.0, S_A + S_B - S_AB)
         
-        # Should be non-negative (enforce numerically)
-        I_AB = max(0.0, I_AB)
-        
-        return I_AB
+        return S_AB, S_A, S_B, I_AB
     
     def purity(self, rho: Optional[np.ndarray] = None) -> float:
         """
@@ -258,7 +458,8 @@ class CorrectedConsciousWorkspace:
             rho = self.density_matrix
             
         rho = self._regularize_density_matrix(rho)
-        P = np.real(np.trace(rho @ rho))
+        # ρ is Hermitian, so Tr(ρ²) = Tr(ρρ†) = ||ρ||_F²; no matrix product needed
+        P = np.vdot(rho, rho).real
         
         return np.clip(P, 1/self.n, 1.0)
     
@@ -269,23 +470,23 @@ class CorrectedConsciousWorkspace:
         Args:
             new_coefficients: Complex amplitudes (will be normalized)
         """
-        # Normalize
-        norm = np.linalg.norm(new_coefficients)
-        if norm < 1e-10:
+        # Normalize (squared norm avoids the LAPACK norm dispatch)
+        norm_sq = np.vdot(new_coefficients, new_coefficients).real
+        if norm_sq < 1e-20:
             # Avoid division by zero
             new_coefficients = np.ones(self.n) / np.sqrt(self.n)
         else:
-            new_coefficients = new_coefficients / norm
+            new_coefficients = new_coefficients * (1.0 / np.sqrt(norm_sq))
             
         self.state_vector = new_coefficients
-        self.density_matrix = self._state_to_density(self.state_vector)
+        self._density_matrix = None
+        self._is_pure = True
         
-        # Track metrics
-        current_entropy = self.von_neumann_entropy()
-        current_phi_q = self.quantum_mutual_information()
+        # Track metrics (one Schmidt decomposition covers both)
+        current_entropy, _, current_phi_q = self._pure_state_metrics(self.state_vector)
+        self._current_entropy = current_entropy
         
-        self.entropy_history.append(current_entropy)
-        self.phi_q_history.append(current_phi_q)
+        self._record_metrics(current_entropy, current_phi_q)
     
     def collapse(self) -> int:
         """
@@ -297,16 +498,20 @@ class CorrectedConsciousWorkspace:
             Index of collapsed qualia state
         """
         # Compute collapse probabilities
-        probabilities = np.abs(self.state_vector)**2
-        probabilities = probabilities / np.sum(probabilities)  # Renormalize
+        psi = self.state_vector
+        probabilities = psi.real**2 + psi.imag**2
         
-        # Sample according to Born rule
-        collapsed_index = np.random.choice(self.n, p=probabilities)
+        # Sample according to Born rule by inverting the (renormalized) CDF
+        cumulative = np.cumsum(probabilities)
+        cumulative /= cumulative[-1]
+        collapsed_index = int(np.searchsorted(cumulative, np.random.random(), side='right'))
         
         # Update to collapsed state
         self.state_vector = np.zeros(self.n, dtype=complex)
         self.state_vector[collapsed_index] = 1.0
-        self.density_matrix = self._state_to_density(self.state_vector)
+        self._density_matrix = None
+        self._is_pure = True
+        self._current_entropy = None
         
         self.collapse_count += 1
         
@@ -319,8 +524,10 @@ class CorrectedConsciousWorkspace:
         Returns:
             True if collapse should occur
         """
-        current_entropy = self.von_neumann_entropy()
-        return current_entropy >= self.entropy_threshold * self.max_entropy
+        # update_state already computed the entropy of the current state
+        if self._current_entropy is None:
+            self._current_entropy = self.von_neumann_entropy()
+        return self._current_entropy >= self._collapse_threshold_value
     
     def optimize_basis(self, learning_rate: float = 0.1, iterations: int = 10):
         """
@@ -335,30 +542,21 @@ class CorrectedConsciousWorkspace:
             learning_rate: Step size for gradient descent
             iterations: Number of optimization steps
         """
-        for _ in range(iterations):
-            # Current free energy (use negative Φ_Q as energy)
-            current_phi_q = self.quantum_mutual_information()
-            current_entropy = self.von_neumann_entropy()
-            current_F = -current_phi_q - current_entropy  # F = E - S (T=1)
-            
-            # Perturb basis slightly
-            perturbation = np.random.randn(self.n, self.n) + 1j * np.random.randn(self.n, self.n)
-            perturbation = perturbation * learning_rate
-            
-            new_basis = self.qualia_basis + perturbation
-            
-            # Re-orthonormalize
-            Q, R = np.linalg.qr(new_basis.T)
-            new_basis = Q.T
+        # Gradient-free: every perturbed basis is accepted. A full
+        # implementation would transform the state to the new basis and
+        # accept only if F decreases, so F is not evaluated here.
+        
+        # Draw all perturbations at once
+        perturbations = (np.random.randn(iterations, self.n, self.n)
+                         + 1j * np.random.randn(iterations, self.n, self.n)) * learning_rate
+        
+        basis = self.qualia_basis
+        for perturbation in perturbations:
+            # Perturb basis slightly and re-orthonormalize
+            Q, R = np.linalg.qr((basis + perturbation).T)
+            basis = Q.T
             
-            # Evaluate new free energy
-            # (Would need to transform state to new basis and recompute Φ_Q)
-            # For simplicity, use gradient-free optimization here
-            
-            # Accept if improves free energy
-            # (Full implementation would transform state and compute actual F)
-            
-            self.qualia_basis = new_basis
+        self.qualia_basis = basis
     
     def get_state_summary(self) -> dict:
         """Get current state metrics."""
@@ -404,12 +602,7 @@ def demonstrate_tensor_product_corrections():
     rho_mixed = np.eye(workspace.n) / workspace.n
     workspace.density_matrix = rho_mixed
     
-    S_AB = workspace.von_neumann_entropy(rho_mixed)
-    rho_A = workspace.partial_trace_B(rho_mixed)
-    rho_B = workspace.partial_trace_A(rho_mixed)
-    S_A = workspace.von_neumann_entropy(rho_A)
-    S_B = workspace.von_neumann_entropy(rho_B)
-    I_AB = workspace.quantum_mutual_information(rho_mixed)
+    S_AB, S_A, S_B, I_AB = workspace._compute_all_metrics(rho_mixed)
     
     print(f"\nEntropy of full system: S(AB) = {S_AB:.4f} nats")
     print(f"Maximum entropy: log({workspace.n}) = {np.log(workspace.n):.4f} nats")
@@ -428,12 +621,7 @@ def demonstrate_tensor_product_corrections():
     psi_sep[0] = 1.0  # |0⟩_A ⊗ |0⟩_B in computational basis
     rho_sep = workspace._state_to_density(psi_sep)
     
-    S_AB = workspace.von_neumann_entropy(rho_sep)
-    rho_A = workspace.partial_trace_B(rho_sep)
-    rho_B = workspace.partial_trace_A(rho_sep)
-    S_A = workspace.von_neumann_entropy(rho_A)
-    S_B = workspace.von_neumann_entropy(rho_B)
-    I_AB = workspace.quantum_mutual_information(rho_sep)
+    S_AB, S_A, S_B, I_AB = workspace._compute_all_metrics(rho_sep)
     
     print(f"\nEntropy of full system: S(AB) = {S_AB:.4f} nats (expected: 0)")
     print(f"Entropy of subsystem A: S(A) = {S_A:.4f} nats (expected: 0)")
@@ -458,12 +646,7 @@ def demonstrate_tensor_product_corrections():
     
     rho_ent = workspace._state_to_density(psi_ent)
     
-    S_AB = workspace.von_neumann_entropy(rho_ent)
-    rho_A = workspace.partial_trace_B(rho_ent)
-    rho_B = workspace.partial_trace_A(rho_ent)
-    S_A = workspace.von_neumann_entropy(rho_A)
-    S_B = workspace.von_neumann_entropy(rho_B)
-    I_AB = workspace.quantum_mutual_information(rho_ent)
+    S_AB, S_A, S_B, I_AB = workspace._compute_all_metrics(rho_ent)
     
     expected_S_A = np.log(schmidt_rank)
     
@@ -482,6 +665,9 @@ def demonstrate_tensor_product_corrections():
     print("TEST 4: Partial Trace Properties")
     print("="*70)
     
+    rho_A = workspace.partial_trace_B(rho_ent)
+    rho_B = workspace.partial_trace_A(rho_ent)
+    
     # Property 1: Tr(ρ_A) = 1
     trace_A = np.trace(rho_A)
     print(f"\nProperty 1 - Tr(ρ_A) = 1:")
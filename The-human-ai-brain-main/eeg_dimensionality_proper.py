@@ -9,11 +9,17 @@ that replicates known neurophysiological patterns across consciousness states.
 """
 
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Headless: figures are only ever saved to disk
 import matplotlib.pyplot as plt
-from sklearn.decomposition import PCA
-from sklearn.preprocessing import StandardScaler
+from scipy.linalg import eigh
 
-np.random.seed(42)
+# Shared generator (PCG64) for all synthetic data
+rng = np.random.default_rng(42)
+
+# Above this channel count only the leading eigenvalues are computed
+FULL_SPECTRUM_MAX_CHANNELS = 64
+TOP_K_COMPONENTS = 20
 
 def generate_spatial_pattern(n_channels, n_components, spread=0.3):
     """
@@ -23,19 +29,17 @@ def generate_spatial_pattern(n_channels, n_components, spread=0.3):
     spatial falloff based on distance from source.
     """
     # Random source locations on unit sphere
-    sources = np.random.randn(n_components, 3)
+    sources = rng.standard_normal((n_components, 3))
     sources = sources / np.linalg.norm(sources, axis=1, keepdims=True)
     
     # Random sensor locations (approximate head surface)
-    sensors = np.random.randn(n_channels, 3)
+    sensors = rng.standard_normal((n_channels, 3))
     sensors = sensors / np.linalg.norm(sensors, axis=1, keepdims=True)
     
-    # Mixing matrix: spatial falloff with distance
-    mixing = np.zeros((n_channels, n_components))
-    for i in range(n_channels):
-        for j in range(n_components):
-            distance = np.linalg.norm(sensors[i] - sources[j])
-            mixing[i, j] = np.exp(-distance**2 / (2 * spread**2))
+    # Mixing matrix: spatial falloff with distance, all sensor/source pairs at once
+    diff = sensors[:, None, :] - sources[None, :, :]  # (n_channels, n_components, 3)
+    distance_sq = np.einsum('ijk,ijk->ij', diff, diff)
+    mixing = np.exp(-distance_sq / (2 * spread**2))
     
     # Normalize columns
     mixing = mixing / np.linalg.norm(mixing, axis=0, keepdims=True)
@@ -53,65 +57,99 @@ def generate_eeg_state(n_epochs, n_channels, n_samples, n_components,
     
     # Time series for each component
     t = np.linspace(0, 10, n_samples)  # 10 seconds
-    components = np.zeros((n_components, n_samples))
     
-    for i in range(n_components):
-        # Each component has characteristic frequency
-        freq = freq_range[0] + (freq_range[1] - freq_range[0]) * i / max(1, n_components-1)
-        
-        # Oscillatory component + noise
-        components[i, :] = np.sin(2 * np.pi * freq * t)
-        components[i, :] += 0.2 * np.sin(2 * np.pi * freq * 2.3 * t)  # Harmonic
-        components[i, :] += noise_level * np.random.randn(n_samples)
+    # Each component has characteristic frequency
+    freqs = freq_range[0] + (freq_range[1] - freq_range[0]) * np.arange(n_components) / max(1, n_components-1)
+    phase = 2 * np.pi * np.outer(freqs, t)  # (n_components, n_samples)
     
-    # Generate epochs
-    data = np.zeros((n_epochs, n_channels, n_samples))
+    # Oscillatory component + noise
+    components = np.sin(phase)
+    components += 0.2 * np.sin(2.3 * phase)  # Harmonic
+    components += noise_level * rng.standard_normal((n_components, n_samples))
     
-    for epoch in range(n_epochs):
-        # Epoch-specific amplitude variations
-        amplitudes = 1.0 + 0.3 * np.random.randn(n_components)
-        
-        # Mix components into channels
-        for ch in range(n_channels):
-            for comp in range(n_components):
-                data[epoch, ch, :] += amplitudes[comp] * mixing[ch, comp] * components[comp, :]
-        
-        # Additional channel noise
-        data[epoch, :, :] += 0.1 * np.random.randn(n_channels, n_samples)
+    # Epoch-specific amplitude variations
+    amplitudes = 1.0 + 0.3 * rng.standard_normal((n_epochs, n_components))
+    
+    # Mix components into channels for every epoch:
+    # data[e, c, t] = Σ_k amplitudes[e, k] · mixing[c, k] · components[k, t]
+    # Scaling the small (epochs, channels, components) weights first leaves a
+    # batched GEMM against the components; nothing larger than the output
+    # itself is allocated.
+    weights = amplitudes[:, None, :] * mixing[None, :, :]
+    data = weights @ components
+    
+    # Additional channel noise
+    data += 0.1 * rng.standard_normal((n_epochs, n_channels, n_samples))
     
     return data
 
-def compute_dimensionality(data, state_name):
-    """Compute effective dimensionality using multiple metrics."""
-    
-    n_epochs, n_channels, n_samples = data.shape
+def compute_dimensionality(data, state_name, scratch=None, cov=None):
+    """Compute effective dimensionality using multiple metrics.
     
-    # Reshape for PCA: (n_epochs * n_samples, n_channels)
-    data_reshaped = data.transpose(0, 2, 1).reshape(-1, n_channels)
+    scratch (shaped like data) and cov (n_channels × n_channels) are
+    optional work buffers, so repeated calls can share one allocation.
+    """
     
-    # Standardize
-    scaler = StandardScaler()
-    data_scaled = scaler.fit_transform(data_reshaped)
+    n_epochs, n_channels, n_samples = data.shape
     
-    # PCA
-    pca = PCA()
-    pca.fit(data_scaled)
+    n_obs = n_epochs * n_samples  # Observations per channel
     
-    explained_var = pca.explained_variance_ratio_
+    # Center each channel over epochs and samples. The covariance is
+    # accumulated per epoch straight from the (epochs, channels, samples)
+    # layout, so neither a transposed (n_obs, n_channels) copy nor a stack
+    # of per-epoch (n_channels × n_channels) products is ever made.
+    centered = np.subtract(data, data.mean(axis=(0, 2), keepdims=True), out=scratch)
+    if cov is None:
+        cov = np.zeros((n_channels, n_channels))
+    else:
+        cov.fill(0.0)
+    for epoch in centered:
+        cov += epoch @ epoch.T
+    cov /= n_obs - 1
+    
+    # Standardizing each channel (population std; constant channels are left
+    # unscaled, as in sklearn's StandardScaler) rescales the covariance
+    std = np.sqrt(np.diag(cov) * (n_obs - 1) / n_obs)
+    std[std == 0.0] = 1.0
+    cov /= np.outer(std, std)
+    
+    # PCA via the (n_channels × n_channels) covariance: the data is tall and
+    # thin, so its eigendecomposition is much cheaper than an SVD of the data.
+    # For dense montages only the top-k eigenvalues are computed; the total
+    # variance is the trace, so they are still normalized exactly. If they
+    # don't reach the 90% threshold the full spectrum is needed after all.
+    subset = None
+    if n_channels > FULL_SPECTRUM_MAX_CHANNELS:
+        subset = [n_channels - TOP_K_COMPONENTS, n_channels - 1]
+        total_var = np.trace(cov)
+        eigenvalues = eigh(cov, eigvals_only=True, subset_by_index=subset,
+                           driver='evr', check_finite=False)[::-1]
+        eigenvalues = np.maximum(eigenvalues, 0.0)
+        if eigenvalues.sum() < 0.90 * total_var:
+            subset = None
+    if subset is None:
+        eigenvalues = eigh(cov, eigvals_only=True, driver='evr',
+                           check_finite=False)[::-1]  # Descending, like PCA
+        eigenvalues = np.maximum(eigenvalues, 0.0)  # Covariance is PSD
+        total_var = eigenvalues.sum()
+    
+    explained_var = eigenvalues / total_var
     cumsum = np.cumsum(explained_var)
     
-    # Method 1: 90% variance threshold
-    n_90 = np.argmax(cumsum >= 0.90) + 1
-    
-    # Method 2: 80% variance threshold
-    n_80 = np.argmax(cumsum >= 0.80) + 1
+    # Methods 1 & 2: 80% / 90% variance thresholds, one binary search over
+    # the (non-decreasing) cumulative variance for both
+    n_80, n_90 = np.searchsorted(cumsum, [0.80, 0.90]) + 1
     
-    # Method 3: Participation Ratio
-    pr = np.sum(explained_var)**2 / np.sum(explained_var**2)
+    # Method 3: Participation Ratio (sum of squared eigenvalues is the
+    # squared Frobenius norm, so it stays exact for a truncated spectrum)
+    if subset is None:
+        pr = cumsum[-1]**2 / np.dot(explained_var, explained_var)
+    else:
+        pr = total_var**2 / np.vdot(cov, cov)
     
-    # Method 4: Entropy-based
-    epsilon = 1e-10
-    entropy = -np.sum(explained_var * np.log(explained_var + epsilon))
+    # Method 4: Entropy-based (zero-variance components contribute nothing)
+    nonzero = explained_var[explained_var > 1e-12]
+    entropy = -np.dot(nonzero, np.log(nonzero))
     d_eff_entropy = np.exp(entropy)
     
     results = {
@@ -173,7 +211,8 @@ def plot_comprehensive_results(all_results, save_path='/home/user/eeg_fdqc_valid
     for i, stage in enumerate(stages):
         eigenvals = all_results[stage]['eigenvalues'][:15]  # First 15
         ax1.plot(range(1, len(eigenvals)+1), eigenvals, 
-                'o-', label=stage, color=colors[i], markersize=5, linewidth=2, alpha=0.8)
+                'o-', label=stage, color=colors[i], markersize=5, linewidth=2, alpha=0.8,
+                rasterized=True)
     
     ax1.set_xlabel('PC Index', fontsize=11)
     ax1.set_ylabel('Explained Variance', fontsize=11)
@@ -187,7 +226,8 @@ def plot_comprehensive_results(all_results, save_path='/home/user/eeg_fdqc_valid
     for i, stage in enumerate(stages):
         cumsum = all_results[stage]['cumsum'][:20]  # First 20
         ax2.plot(range(1, len(cumsum)+1), cumsum * 100, 
-                'o-', label=stage, color=colors[i], markersize=5, linewidth=2, alpha=0.8)
+                'o-', label=stage, color=colors[i], markersize=5, linewidth=2, alpha=0.8,
+                rasterized=True)
     
     ax2.axhline(y=90, color='red', linestyle='--', linewidth=1.5, alpha=0.7)
     ax2.axhline(y=80, color='orange', linestyle='--', linewidth=1.5, alpha=0.7)
@@ -225,7 +265,9 @@ def plot_comprehensive_results(all_results, save_path='/home/user/eeg_fdqc_valid
     ax3.legend(fontsize=10, ncol=5, loc='upper center', bbox_to_anchor=(0.5, -0.15))
     ax3.grid(axis='y', alpha=0.3)
     
-    plt.savefig(save_path, dpi=300, bbox_inches='tight')
+    # The gridspec already leaves room for the legend below ax3, so the
+    # extra layout pass of bbox_inches='tight' is skipped
+    plt.savefig(save_path, dpi=300)
     print(f"\\n✓ Comprehensive results saved to: {save_path}")
     
     return fig
@@ -233,44 +275,48 @@ def plot_comprehensive_results(all_results, save_path='/home/user/eeg_fdqc_valid
 def print_validation_report(all_results):
     """Print detailed validation report."""
     
-    print("\\n" + "="*80)
-    print(" "*15 + "FDQC PREDICTION 1B VALIDATION REPORT")
-    print("="*80)
+    # Collect the report and write it to stdout in one go
+    lines = []
+    out = lines.append
+    
+    out("\\n" + "="*80)
+    out(" "*15 + "FDQC PREDICTION 1B VALIDATION REPORT")
+    out("="*80)
     
     wake_pr = all_results['Wake']['pr']
     wake_n90 = all_results['Wake']['n_90']
     
-    print(f"\\n{'PRIMARY RESULT':-^80}")
-    print(f"\\n  Waking Consciousness Effective Dimensionality:")
-    print(f"    Participation Ratio:  n_eff = {wake_pr:.2f}")
-    print(f"    90% Variance:         n_90  = {wake_n90}")
-    print(f"    80% Variance:         n_80  = {all_results['Wake']['n_80']}")
-    print(f"    Entropy-Based:        n_ent = {all_results['Wake']['entropy']:.2f}")
+    out(f"\\n{'PRIMARY RESULT':-^80}")
+    out(f"\\n  Waking Consciousness Effective Dimensionality:")
+    out(f"    Participation Ratio:  n_eff = {wake_pr:.2f}")
+    out(f"    90% Variance:         n_90  = {wake_n90}")
+    out(f"    80% Variance:         n_80  = {all_results['Wake']['n_80']}")
+    out(f"    Entropy-Based:        n_ent = {all_results['Wake']['entropy']:.2f}")
     
     # Test against FDQC prediction
     prediction_range = (5, 9)
     prediction_central = 7
     
-    print(f"\\n{'FDQC PREDICTION TEST':-^80}")
-    print(f"\\n  Predicted Range: n = 7 ± 2  (i.e., n ∈ [{prediction_range[0]}, {prediction_range[1]}])")
-    print(f"  Observed Value:  n = {wake_pr:.2f}")
+    out(f"\\n{'FDQC PREDICTION TEST':-^80}")
+    out(f"\\n  Predicted Range: n = 7 ± 2  (i.e., n ∈ [{prediction_range[0]}, {prediction_range[1]}])")
+    out(f"  Observed Value:  n = {wake_pr:.2f}")
     
     if prediction_range[0] <= wake_pr <= prediction_range[1]:
         deviation = abs(wake_pr - prediction_central)
         percent_dev = (deviation / prediction_central) * 100
-        print(f"\\n  ✓ PREDICTION CONFIRMED")
-        print(f"    - Falls within 7±2 range")
-        print(f"    - Deviation from central value: {deviation:.2f} dimensions ({percent_dev:.1f}%)")
+        out(f"\\n  ✓ PREDICTION CONFIRMED")
+        out(f"    - Falls within 7±2 range")
+        out(f"    - Deviation from central value: {deviation:.2f} dimensions ({percent_dev:.1f}%)")
         status = "VALIDATED"
     else:
-        print(f"\\n  ✗ Prediction outside range")
-        print(f"    - Note: This is synthetic data for methodology demonstration")
+        out(f"\\n  ✗ Prediction outside range")
+        out(f"    - Note: This is synthetic data for methodology demonstration")
         status = "PENDING REAL DATA"
     
     # Consciousness state comparison
-    print(f"\\n{'ACROSS CONSCIOUSNESS STATES':-^80}")
-    print(f"\\n  State                    | n_eff (PR) | n_90 | n_80 | Status")
-    print(f"  {'-'*24} | {'-'*10} | {'-'*4} | {'-'*4} | {'-'*15}")
+    out(f"\\n{'ACROSS CONSCIOUSNESS STATES':-^80}")
+    out(f"\\n  State                    | n_eff (PR) | n_90 | n_80 | Status")
+    out(f"  {'-'*24} | {'-'*10} | {'-'*4} | {'-'*4} | {'-'*15}")
     
     for stage in ['Wake', 'N1', 'N2', 'N3', 'REM']:
         pr = all_results[stage]['pr']
@@ -286,62 +332,64 @@ def print_validation_report(all_results):
         else:
             status_str = ''
         
-        print(f"  {stage:24s} | {pr:10.2f} | {n90:4d} | {n80:4d} | {status_str}")
+        out(f"  {stage:24s} | {pr:10.2f} | {n90:4d} | {n80:4d} | {status_str}")
     
     # Dimensionality reduction analysis
     deep_sleep_pr = all_results['N3']['pr']
     reduction = (wake_pr - deep_sleep_pr) / wake_pr * 100
     
-    print(f"\\n{'STATE TRANSITION ANALYSIS':-^80}")
-    print(f"\\n  Wake → Deep Sleep Transition:")
-    print(f"    Wake dimensionality:       n = {wake_pr:.2f}")
-    print(f"    Deep sleep dimensionality: n = {deep_sleep_pr:.2f}")
-    print(f"    Reduction:                 Δn = {wake_pr - deep_sleep_pr:.2f} ({reduction:.1f}%)")
-    print(f"\\n  Interpretation:")
-    print(f"    ✓ Consciousness strongly correlates with dimensionality")
-    print(f"    ✓ Loss of consciousness → collapse to lower-dimensional state")
-    print(f"    ✓ Supports FDQC's dimensional constraint mechanism")
+    out(f"\\n{'STATE TRANSITION ANALYSIS':-^80}")
+    out(f"\\n  Wake → Deep Sleep Transition:")
+    out(f"    Wake dimensionality:       n = {wake_pr:.2f}")
+    out(f"    Deep sleep dimensionality: n = {deep_sleep_pr:.2f}")
+    out(f"    Reduction:                 Δn = {wake_pr - deep_sleep_pr:.2f} ({reduction:.1f}%)")
+    out(f"\\n  Interpretation:")
+    out(f"    ✓ Consciousness strongly correlates with dimensionality")
+    out(f"    ✓ Loss of consciousness → collapse to lower-dimensional state")
+    out(f"    ✓ Supports FDQC's dimensional constraint mechanism")
     
     # REM vs Wake comparison
     rem_pr = all_results['REM']['pr']
     rem_ratio = rem_pr / wake_pr
     
-    print(f"\\n  REM Sleep Analysis:")
-    print(f"    REM dimensionality:        n = {rem_pr:.2f}")
-    print(f"    REM/Wake ratio:            {rem_ratio:.2f}")
-    print(f"\\n  Interpretation:")
-    print(f"    ✓ REM ≈ {rem_ratio*100:.0f}% of wake dimensionality")
-    print(f"    ✓ Consistent with conscious dreaming (reduced but present)")
-    
-    print(f"\\n{'METHODOLOGY NOTES':-^80}")
-    print(f"\\n  Requirements for Real Data Validation:")
-    print(f"    1. High-density EEG: ≥64 channels (standard sleep studies use only 2-8)")
-    print(f"    2. Sufficient epochs: ≥50 per state for stable covariance estimation")
-    print(f"    3. Clean preprocessing: Artifact removal, proper filtering")
-    print(f"    4. Multiple subjects: n≥20 for population statistics")
-    print(f"\\n  This Analysis:")
-    print(f"    - Demonstrates methodology with 64-channel synthetic EEG")
-    print(f"    - Validates analysis pipeline")
-    print(f"    - Shows expected pattern if FDQC is correct")
-    print(f"    - Ready for application to real high-density EEG databases")
-    
-    print(f"\\n{'EXPERIMENTAL RECOMMENDATIONS':-^80}")
-    print(f"\\n  Suggested Datasets:")
-    print(f"    1. OpenNeuro: High-density EEG during sleep stages")
-    print(f"    2. EEGBase: European database with 64+ channel recordings")
-    print(f"    3. Temple University EEG Corpus: Clinical EEG archives")
-    print(f"\\n  Analysis Protocol:")
-    print(f"    1. Source localization (LORETA/sLORETA) to identify neural sources")
-    print(f"    2. PCA in source space (not sensor space) for true dimensionality")
-    print(f"    3. Bootstrap resampling for confidence intervals")
-    print(f"    4. Bayesian estimation for n_eff with uncertainty quantification")
-    
-    print(f"\\n{'PUBLICATION STATUS':-^80}")
-    print(f"\\n  Prediction 1B Status: {status}")
-    print(f"  Ready for Manuscript: {'YES - with methodological notes' if status == 'VALIDATED' else 'PENDING REAL DATA'}")
-    print(f"  Recommended Action: Apply to institutional high-density EEG database")
-    
-    print(f"\\n" + "="*80)
+    out(f"\\n  REM Sleep Analysis:")
+    out(f"    REM dimensionality:        n = {rem_pr:.2f}")
+    out(f"    REM/Wake ratio:            {rem_ratio:.2f}")
+    out(f"\\n  Interpretation:")
+    out(f"    ✓ REM ≈ {rem_ratio*100:.0f}% of wake dimensionality")
+    out(f"    ✓ Consistent with conscious dreaming (reduced but present)")
+    
+    out(f"\\n{'METHODOLOGY NOTES':-^80}")
+    out(f"\\n  Requirements for Real Data Validation:")
+    out(f"    1. High-density EEG: ≥64 channels (standard sleep studies use only 2-8)")
+    out(f"    2. Sufficient epochs: ≥50 per state for stable covariance estimation")
+    out(f"    3. Clean preprocessing: Artifact removal, proper filtering")
+    out(f"    4. Multiple subjects: n≥20 for population statistics")
+    out(f"\\n  This Analysis:")
+    out(f"    - Demonstrates methodology with 64-channel synthetic EEG")
+    out(f"    - Validates analysis pipeline")
+    out(f"    - Shows expected pattern if FDQC is correct")
+    out(f"    - Ready for application to real high-density EEG databases")
+    
+    out(f"\\n{'EXPERIMENTAL RECOMMENDATIONS':-^80}")
+    out(f"\\n  Suggested Datasets:")
+    out(f"    1. OpenNeuro: High-density EEG during sleep stages")
+    out(f"    2. EEGBase: European database with 64+ channel recordings")
+    out(f"    3. Temple University EEG Corpus: Clinical EEG archives")
+    out(f"\\n  Analysis Protocol:")
+    out(f"    1. Source localization (LORETA/sLORETA) to identify neural sources")
+    out(f"    2. PCA in source space (not sensor space) for true dimensionality")
+    out(f"    3. Bootstrap resampling for confidence intervals")
+    out(f"    4. Bayesian estimation for n_eff with uncertainty quantification")
+    
+    out(f"\\n{'PUBLICATION STATUS':-^80}")
+    out(f"\\n  Prediction 1B Status: {status}")
+    out(f"  Ready for Manuscript: {'YES - with methodological notes' if status == 'VALIDATED' else 'PENDING REAL DATA'}")
+    out(f"  Recommended Action: Apply to institutional high-density EEG database")
+    
+    out(f"\\n" + "="*80)
+    
+    print("\n".join(lines))
 
 def main():
     """Main analysis."""
@@ -397,10 +445,15 @@ def main():
     print("Computing Effective Dimensionality")
     print("="*80)
     
+    # All states share one shape, so the work buffers are allocated once
+    scratch = np.empty((n_epochs, n_channels, n_samples))
+    cov = np.empty((n_channels, n_channels))
+    
     all_results = {}
     for state in ['Wake', 'N1', 'N2', 'N3', 'REM']:
         print(f"\\n  {state}...")
-        all_results[state] = compute_dimensionality(states_data[state], state)
+        all_results[state] = compute_dimensionality(states_data[state], state,
+                                                    scratch, cov)
         print(f"    n_90={all_results[state]['n_90']}, "
               f"n_80={all_results[state]['n_80']}, "
               f"PR={all_results[state]['pr']:.2f}")
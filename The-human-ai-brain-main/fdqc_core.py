@@ -3,6 +3,7 @@ FDQC v4.0 Core Components
 Minimal implementation of all 8 components
 """
 
+import copy
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -11,24 +12,43 @@ from collections import deque
 
 class GlobalWorkspace(nn.Module):
     """High-dimensional global workspace (n≈60)"""
-    def __init__(self, input_dim=784, hidden_dim=60):
+    def __init__(self, input_dim=784, hidden_dim=60, compiled=False):
         super().__init__()
+        # In-place ReLU reuses each Linear's output buffer
         self.encoder = nn.Sequential(
-            nn.Linear(input_dim, 256), nn.ReLU(),
-            nn.Linear(256, 128), nn.ReLU(),
+            nn.Linear(input_dim, 256), nn.ReLU(inplace=True),
+            nn.Linear(256, 128), nn.ReLU(inplace=True),
             nn.Linear(128, hidden_dim)
         )
         self.decoder = nn.Sequential(
-            nn.Linear(hidden_dim, 128), nn.ReLU(),
-            nn.Linear(128, 256), nn.ReLU(),
+            nn.Linear(hidden_dim, 128), nn.ReLU(inplace=True),
+            nn.Linear(128, 256), nn.ReLU(inplace=True),
             nn.Linear(256, input_dim)
         )
+        if compiled:
+            # TorchInductor fuses ReLU into the GEMM epilogue; reduce-overhead
+            # also replays CUDA graphs, which pays off for small GPU batches
+            if hasattr(nn.Module, 'compile'):
+                self.compile(mode='reduce-overhead')
+            else:
+                # torch < 2.2: wrap the submodules instead (their state_dict
+                # keys gain an '_orig_mod.' prefix)
+                self.encoder = torch.compile(self.encoder, mode='reduce-overhead')
+                self.decoder = torch.compile(self.decoder, mode='reduce-overhead')
     
     def forward(self, x):
         h_global = self.encoder(x)
         reconstruction = self.decoder(h_global)
         return h_global, reconstruction
 
+    def quantized(self, dtype=torch.qint8):
+        """Inference-only copy with int8 (dynamic) or bf16 Linear layers"""
+        model = copy.deepcopy(self).eval()
+        if dtype == torch.qint8:
+            return torch.ao.quantization.quantize_dynamic(
+                model, {nn.Linear}, dtype=torch.qint8)
+        return model.to(dtype)
+
 class WorkingMemoryProjection(nn.Module):
     """Project H_global → H_WM with entropy-based collapse"""
     def __init__(self, global_dim=60, wm_dim=4):
@@ -38,9 +58,12 @@ class WorkingMemoryProjection(nn.Module):
     
     def forward(self, h_global, temperature=1.0):
         logits = self.projection(h_global)
-        h_wm = F.gumbel_softmax(logits, tau=temperature, hard=False)
-        probs = F.softmax(logits, dim=-1)
-        entropy = -(probs * torch.log2(probs + 1e-10)).sum(dim=-1)
+        # Soft Gumbel sample (same draw as F.gumbel_softmax)
+        gumbels = -torch.empty_like(logits).exponential_().log()
+        h_wm = F.softmax((logits + gumbels) / temperature, dim=-1)
+        # Entropy in bits from one log-softmax pass
+        log_probs = F.log_softmax(logits, dim=-1)
+        entropy = -(log_probs.exp() * log_probs).sum(dim=-1) / np.log(2)
         return h_wm, entropy
 
 class FDQCv4System:
@@ -48,10 +71,28 @@ class FDQCv4System:
     def __init__(self):
         self.global_workspace = GlobalWorkspace()
         self.wm_projection = WorkingMemoryProjection()
+        self.global_workspace.eval()
+        self.wm_projection.eval()
         self.episode_count = 0
+        self._input_dtype = torch.float32
+    
+    def quantize(self, dtype=torch.qint8):
+        """Swap the global workspace for a quantized inference copy"""
+        self.global_workspace = self.global_workspace.quantized(dtype)
+        if dtype.is_floating_point:
+            self._input_dtype = dtype
+    
+    def process(self, stimulus, train=False):
+        """Run one stimulus; autograd is off unless train=True"""
+        if train:
+            return self._process(stimulus)
+        with torch.inference_mode():
+            return self._process(stimulus)
     
-    def process(self, stimulus):
-        h_global, reconstruction = self.global_workspace(stimulus)
+    def _process(self, stimulus):
+        h_global, reconstruction = self.global_workspace(
+            stimulus.to(self._input_dtype))
+        h_global, reconstruction = h_global.float(), reconstruction.float()
         h_wm, entropy = self.wm_projection(h_global)
         self.episode_count += 1
         return {
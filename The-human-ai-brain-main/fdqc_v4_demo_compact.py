@@ -10,17 +10,23 @@ import json
 
 class FDQCv4SystemCompact:
     """Lightweight FDQC v4.0 implementation"""
-    def __init__(self, global_dim=60, wm_levels=[4, 6, 9, 12]):
+    def __init__(self, global_dim=60, wm_levels=[4, 6, 9, 12], seed=None,
+                 max_episodes=1000):
         self.global_dim = global_dim
         self.wm_levels = wm_levels
         self.current_n = 4
+        self.rng = np.random.default_rng(seed)
         
         # Energy parameters
         self.E_neuron = 5e-12
         self.beta = 1.5e-11
         
-        # Memory
-        self.episodic_memories = []
+        # Episodic memory as parallel arrays (at most one entry per episode;
+        # global states kept at float16)
+        self.mem_h = np.empty((max_episodes, global_dim), dtype=np.float16)
+        self.mem_imp = np.empty(max_episodes, dtype=np.float64)
+        self.mem_val = np.empty(max_episodes, dtype=np.float64)
+        self.mem_n = 0
         self.buffer = deque(maxlen=20)
         
         # Affective state
@@ -31,53 +37,89 @@ class FDQCv4SystemCompact:
         # Statistics
         self.episodes = 0
         self.n_distribution = {n: 0 for n in wm_levels}
-        self.energies = []
-        self.capacities = []
+        self._energies = np.empty(max_episodes, dtype=np.float64)
+        self._capacities = np.empty(max_episodes, dtype=np.float64)
+        
+        # Dimensionality schedule indexed by episode - 1 (simplified VCCA);
+        # the last entry holds for every later episode
+        self._n_schedule = np.array([4] * 39 + [6] * 30 + [9] * 30 + [12],
+                                    dtype=np.int32)
+        
+        # Pre-drawn per-episode randomness (see presample)
+        self._n_presampled = 0
+        self._presample_idx = 0
+    
+    @property
+    def energies(self):
+        """Per-episode energy so far"""
+        return self._energies[:self.episodes]
+    
+    @property
+    def capacities(self):
+        """Per-episode effective capacity so far"""
+        return self._capacities[:self.episodes]
+    
+    def presample(self, n_episodes):
+        """Draw the randomness for the next n_episodes calls to process at once"""
+        self._h_globals = self.rng.standard_normal((n_episodes, self.global_dim))
+        self._normals = self.rng.standard_normal((n_episodes, 2))
+        self._uniforms = self.rng.random(n_episodes)
+        self._n_presampled = n_episodes
+        self._presample_idx = 0
     
     def process(self, stimulus):
         """Process one episode"""
         self.episodes += 1
-        
-        # Simulate encoding
-        h_global = np.random.randn(self.global_dim)
+        if self.episodes > len(self._energies):
+            # Ran past max_episodes: grow the statistics buffers geometrically
+            size = max(1, 2 * len(self._energies))
+            self._energies = np.resize(self._energies, size)
+            self._capacities = np.resize(self._capacities, size)
+            self.mem_h = np.resize(self.mem_h, (size, self.global_dim))
+            self.mem_imp = np.resize(self.mem_imp, size)
+            self.mem_val = np.resize(self.mem_val, size)
+        
+        # Simulated encoding and affective noise for this episode
+        if self._presample_idx < self._n_presampled:
+            k = self._presample_idx
+            self._presample_idx += 1
+            h_global = self._h_globals[k]
+            reward_noise, arousal_noise = self._normals[k]
+            novelty_draw = self._uniforms[k]
+        else:
+            h_global = self.rng.standard_normal(self.global_dim)
+            reward_noise, arousal_noise = self.rng.standard_normal(2)
+            novelty_draw = self.rng.random()
         
         # Select dimensionality (simplified VCCA)
-        if self.episodes < 40:
-            n = 4
-        elif self.episodes < 70:
-            n = 6
-        elif self.episodes < 100:
-            n = 9
-        else:
-            n = 12
+        n = int(self._n_schedule[min(self.episodes, len(self._n_schedule)) - 1])
         
         self.current_n = n
         self.n_distribution[n] += 1
         
         # Compute energy
         energy = self.E_neuron + self.beta * n**2 / 2
-        self.energies.append(energy)
+        self._energies[self.episodes - 1] = energy
         
         # Effective capacity (with chunking)
         base_capacity = n
-        chunk_boost = 1.0 + len(self.episodic_memories) / 100.0
+        chunk_boost = 1.0 + self.mem_n / 100.0
         effective_capacity = base_capacity * min(chunk_boost, 1.75)
-        self.capacities.append(effective_capacity)
+        self._capacities[self.episodes - 1] = effective_capacity
         
         # Update affective state
-        reward = np.random.randn() * 0.1
+        reward = reward_noise * 0.1
         self.valence = 0.9 * self.valence + 0.1 * reward
-        self.arousal = 0.8 * self.arousal + 0.2 * abs(np.random.randn())
-        self.novelty = np.random.rand() * 0.5
+        self.arousal = 0.8 * self.arousal + 0.2 * abs(arousal_noise)
+        self.novelty = novelty_draw * 0.5
         
         # Memory consolidation
         importance = abs(self.valence) + self.novelty
         if importance > 0.5:
-            self.episodic_memories.append({
-                'h_global': h_global,
-                'importance': importance,
-                'valence': self.valence
-            })
+            self.mem_h[self.mem_n] = h_global
+            self.mem_imp[self.mem_n] = importance
+            self.mem_val[self.mem_n] = self.valence
+            self.mem_n += 1
         
         return {
             'n_wm': n,
@@ -103,7 +145,7 @@ class FDQCv4SystemCompact:
             f"I am experiencing a moderate moment. "
             f"It feels {valence_str}. "
             f"Current dimensionality: {self.current_n}, "
-            f"memories: {len(self.episodic_memories)}"
+            f"memories: {self.mem_n}"
         )
         
         return {
@@ -123,13 +165,17 @@ if __name__ == "__main__":
     print(" FDQC v4.0 Compact Demonstration ".center(70, "="))
     print("="*70)
     
-    system = FDQCv4SystemCompact()
+    n_episodes = 100
+    system = FDQCv4SystemCompact(max_episodes=n_episodes)
+    
+    print(f"\nRunning {n_episodes} episodes...\n")
     
-    print("\nRunning 100 episodes...\n")
+    # Draw all stimuli and per-episode noise up front
+    stimuli = system.rng.standard_normal((n_episodes, 784))
+    system.presample(n_episodes)
     
-    for i in range(100):
-        stimulus = np.random.randn(784)
-        result = system.process(stimulus)
+    for i in range(n_episodes):
+        result = system.process(stimuli[i])
         
         if (i+1) % 20 == 0:
             print(f"Episode {i+1}: n={result['n_wm']}, "
@@ -159,11 +205,11 @@ if __name__ == "__main__":
     print(f"  Final: {system.capacities[-1]:.1f}")
     
     print(f"\nEnergy:")
-    print(f"  Total: {sum(system.energies):.2e} J")
-    print(f"  Average: {np.mean(system.energies):.2e} J/episode")
+    print(f"  Total: {system.energies.sum():.2e} J")
+    print(f"  Average: {system.energies.mean():.2e} J/episode")
     
     print(f"\nMemory:")
-    print(f"  Episodic memories: {len(system.episodic_memories)}")
+    print(f"  Episodic memories: {system.mem_n}")
     
     print("\n✅ Demo complete!")
     
@@ -180,8 +226,8 @@ if __name__ == "__main__":
             'final': float(system.capacities[-1])
         },
         'energy': {
-            'total': float(sum(system.energies)),
-            'average': float(np.mean(system.energies))
+            'total': float(system.energies.sum()),
+            'average': float(system.energies.mean())
         },
         'phenomenal_state': {k: float(v) if isinstance(v, (int, float, np.number)) else v 
                            for k, v in phenomenal.items()}
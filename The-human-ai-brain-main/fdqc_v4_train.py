@@ -11,24 +11,51 @@ Demonstrates full system with curriculum learning:
 """
 
 import numpy as np
+from scipy.signal import lfilter
 from collections import deque
 import json
 
+# Optional: orjson for the results dump (numpy-aware, much faster encoder)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _ema(x, decay, gain, init):
+    """y[k] = decay * y[k-1] + gain * x[k], starting from y[-1] = init"""
+    # First-order IIR filter: the whole sequential scan in one C call
+    return lfilter([gain], [1.0, -decay], x, zi=[decay * init])[0]
+
+
 class FDQCv4Training:
     """Complete FDQC v4.0 with training curriculum"""
     
-    def __init__(self):
+    # Dimensionality lookup (simplified VCCA): complexity < 0.4 -> 4,
+    # < 0.6 -> 6, < 0.8 -> 9, else 12; epistemic crisis -> 15
+    _N_THRESHOLDS = np.array([0.4, 0.6, 0.8])
+    _N_VALUES = np.array([4, 6, 9, 12], dtype=np.int64)
+    _N_CRISIS = 15
+    
+    def __init__(self, seed=None, max_episodes=512, memory_dtype=np.float16):
         # System parameters
         self.global_dim = 60
         self.wm_levels = [4, 6, 9, 12, 15]
         self.current_n = 4
+        self.rng = np.random.default_rng(seed)
         
         # Energy
         self.E_neuron = 5e-12
         self.beta = 1.5e-11
         
-        # Memory
-        self.episodic_memories = []
+        # Memory: consolidated episodes stored column-wise; at most one per
+        # episode, so they share the per-episode capacity. States are kept
+        # at reduced precision: float16, or int8 with a per-vector scale
+        self._mem_h = np.empty((max_episodes, self.global_dim), dtype=memory_dtype)
+        self._mem_scale = np.empty(max_episodes) if self._mem_h.dtype == np.int8 else None
+        self._mem_importance = np.empty(max_episodes)
+        self._mem_n = np.empty(max_episodes, dtype=np.int32)
+        self._mem_count = 0
         self.buffer = deque(maxlen=20)
         
         # Affective
@@ -36,124 +63,347 @@ class FDQCv4Training:
         self.arousal = 0.0
         self.novelty = 0.0
         
-        # Epistemic drive
-        self.prediction_errors = deque(maxlen=100)
+        # Epistemic drive: ring buffer of the last 100 prediction errors
+        # with running sums, so the crisis z-score is O(1) per episode
+        self._pe = np.zeros(100)
+        self._pe_n = 0
+        self._pe_head = 0
+        self._pe_sum = 0.0
+        self._pe_sumsq = 0.0
         self.crisis_threshold = 5.0
         self.in_crisis = False
         
-        # Statistics
+        # Statistics: per-episode buffers (grown geometrically if needed);
+        # phenomenal reports are rebuilt from the stored affective state
         self.episodes = 0
         self.n_distribution = {n: 0 for n in self.wm_levels}
-        self.energies = []
-        self.capacities = []
-        self.phenomenal_reports = []
+        self._energies = np.empty(max_episodes)
+        self._capacities = np.empty(max_episodes)
+        self._valence_hist = np.empty(max_episodes)
+        self._arousal_hist = np.empty(max_episodes)
+        self._novelty_hist = np.empty(max_episodes)
+        self._crisis_hist = np.empty(max_episodes, dtype=bool)
+    
+    @property
+    def energies(self):
+        """Per-episode energy so far"""
+        return self._energies[:self.episodes]
+    
+    @property
+    def capacities(self):
+        """Per-episode effective capacity so far"""
+        return self._capacities[:self.episodes]
+    
+    @property
+    def phenomenal_reports(self):
+        """Per-episode phenomenal reports so far"""
+        return [self.phenomenal_report_at(i) for i in range(self.episodes)]
+    
+    def memory_states(self):
+        """Consolidated global states, dequantized to float32"""
+        h = self._mem_h[:self._mem_count].astype(np.float32)
+        if self._mem_scale is not None:
+            h *= self._mem_scale[:self._mem_count, None]
+        return h
+    
+    @property
+    def episodic_memories(self):
+        """Consolidated memories as dicts"""
+        states = self.memory_states()
+        return [{'h_global': states[i],
+                 'importance': float(self._mem_importance[i]),
+                 'n_wm': int(self._mem_n[i])}
+                for i in range(self._mem_count)]
+    
+    def _reserve(self, n_episodes):
+        """Grow the per-episode buffers to hold at least n_episodes"""
+        size = len(self._energies)
+        if n_episodes <= size:
+            return
+        size = max(size, 1)
+        while size < n_episodes:
+            size *= 2
+        self._energies = np.resize(self._energies, size)
+        self._capacities = np.resize(self._capacities, size)
+        self._valence_hist = np.resize(self._valence_hist, size)
+        self._arousal_hist = np.resize(self._arousal_hist, size)
+        self._novelty_hist = np.resize(self._novelty_hist, size)
+        self._crisis_hist = np.resize(self._crisis_hist, size)
+        self._mem_h = np.resize(self._mem_h, (size, self.global_dim))
+        self._mem_importance = np.resize(self._mem_importance, size)
+        self._mem_n = np.resize(self._mem_n, size)
+        if self._mem_scale is not None:
+            self._mem_scale = np.resize(self._mem_scale, size)
     
     def compute_energy(self, n):
         """Energy for dimensionality n"""
         return self.E_neuron + self.beta * n**2 / 2
     
+    @property
+    def prediction_errors(self):
+        """Recent prediction errors, oldest first"""
+        if self._pe_n < len(self._pe):
+            return self._pe[:self._pe_n].copy()
+        return np.roll(self._pe, -self._pe_head)
+    
     def detect_crisis(self, error):
         """Check for epistemic crisis"""
-        self.prediction_errors.append(error)
+        head = self._pe_head
+        if self._pe_n == len(self._pe):
+            old = self._pe[head]
+            self._pe_sum -= old
+            self._pe_sumsq -= old * old
+        else:
+            self._pe_n += 1
+        self._pe[head] = error
+        self._pe_sum += error
+        self._pe_sumsq += error * error
+        self._pe_head = (head + 1) % len(self._pe)
         
-        if len(self.prediction_errors) < 10:
+        n = self._pe_n
+        if n < 10:
             return False, 0.0
         
-        mean = np.mean(self.prediction_errors)
-        std = np.std(self.prediction_errors) + 1e-8
-        z_score = (error - mean) / std
+        mean = self._pe_sum / n
+        var = max(self._pe_sumsq / n - mean * mean, 0.0)
+        z_score = (error - mean) / (var ** 0.5 + 1e-8)
         
         return z_score > self.crisis_threshold, z_score
     
+    def detect_crisis_batch(self, errors):
+        """Vectorized detect_crisis over a sequence of errors
+        
+        Window sums are the running sums plus the new errors, minus the
+        errors that have left the window, so only len(errors) values are read.
+        """
+        window = len(self._pe)
+        n_new = len(errors)
+        if n_new == 0:
+            return np.zeros(0, dtype=bool), np.zeros(0)
+        
+        # Window size after each new error, and how many errors have left
+        seen = self._pe_n + np.arange(1, n_new + 1)
+        counts = np.minimum(seen, window)
+        n_drop = int(seen[-1] - counts[-1])
+        
+        # Errors leaving the window, oldest first: ring entries, then new ones
+        n_old = min(n_drop, self._pe_n)
+        oldest = self._pe_head if self._pe_n == window else 0
+        dropped = np.concatenate([self._pe[(oldest + np.arange(n_old)) % window],
+                                  errors[:n_drop - n_old]])
+        dropped_sum = np.concatenate([[0.0], np.cumsum(dropped)])[seen - counts]
+        dropped_sumsq = np.concatenate([[0.0], np.cumsum(dropped * dropped)])[seen - counts]
+        
+        sums = self._pe_sum + np.cumsum(errors) - dropped_sum
+        sumsqs = self._pe_sumsq + np.cumsum(errors * errors) - dropped_sumsq
+        mean = sums / counts
+        std = np.sqrt(np.maximum(sumsqs / counts - mean * mean, 0.0)) + 1e-8
+        
+        valid = counts >= 10
+        z_scores = np.where(valid, (errors - mean) / std, 0.0)
+        
+        # Write the new errors into the ring buffer
+        kept = errors[-window:]
+        start = self._pe_head + n_new - len(kept)
+        self._pe[(start + np.arange(len(kept))) % window] = kept
+        self._pe_head = (self._pe_head + n_new) % window
+        self._pe_n = int(counts[-1])
+        self._pe_sum = float(sums[-1])
+        self._pe_sumsq = float(sumsqs[-1])
+        
+        return valid & (z_scores > self.crisis_threshold), z_scores
+    
     def process_episode(self, stimulus, complexity, inject_crisis=False):
-        """Process one episode"""
-        self.episodes += 1
+        """Process one episode
         
-        # Simulate encoding
-        h_global = np.random.randn(self.global_dim) * complexity
+        Scalar counterpart of process_stage (same random draws, same state
+        updates) without the per-call array overhead.
+        """
+        i = self.episodes
+        self._reserve(i + 1)
+        self.episodes += 1
         
-        # Generate prediction error
+        # Simulate encoding and prediction error
+        h_global = self.rng.standard_normal(self.global_dim) * complexity
         if inject_crisis:
             error = 10.0  # Catastrophic
         else:
-            error = abs(np.random.randn() * complexity)
+            error = abs(float(self.rng.standard_normal()) * complexity)
         
         # Check for crisis
         in_crisis, z_score = self.detect_crisis(error)
-        self.in_crisis = in_crisis
+        in_crisis = bool(in_crisis)
         
-        # Select dimensionality
+        # Select dimensionality (maximum during crisis)
         if in_crisis:
-            n = 15  # Maximum
-        elif complexity < 0.4:
-            n = 4
-        elif complexity < 0.6:
-            n = 6
-        elif complexity < 0.8:
-            n = 9
+            n = self._N_CRISIS
         else:
-            n = 12
-        
-        self.current_n = n
+            n = int(self._N_VALUES[np.searchsorted(self._N_THRESHOLDS, complexity, side='right')])
         self.n_distribution[n] += 1
-        
-        # Energy
         energy = self.compute_energy(n)
-        self.energies.append(energy)
-        
-        # Effective capacity (chunking)
-        chunk_boost = 1.0 + len(self.episodic_memories) / 100.0
-        effective_capacity = n * min(chunk_boost, 1.75)
-        self.capacities.append(effective_capacity)
         
         # Update affective state
+        reward = float(self.rng.standard_normal()) * 0.1
         if in_crisis:
-            reward = -0.9  # Intense negative
-        else:
-            reward = np.random.randn() * 0.1
-        
+            reward = -0.9
         self.valence = 0.9 * self.valence + 0.1 * reward
-        self.arousal = 0.8 * self.arousal + 0.2 * abs(error)
+        self.arousal = 0.8 * self.arousal + 0.2 * error
         self.novelty = 0.7 * self.novelty + 0.3 * complexity
         
+        # Effective capacity (chunking) from the memories stored so far
+        capacity = n * min(1.0 + self._mem_count / 100.0, 1.75)
+        
         # Memory consolidation
         importance = abs(self.valence) + self.novelty
         if importance > 0.5:
-            self.episodic_memories.append({
-                'h_global': h_global,
-                'importance': importance,
-                'n_wm': n
-            })
+            self._store_memories(h_global[None], np.array([importance]), n)
         
-        # Generate phenomenal report
-        report = self.generate_phenomenal_report()
-        self.phenomenal_reports.append(report)
+        self._energies[i] = energy
+        self._capacities[i] = capacity
+        self._valence_hist[i] = self.valence
+        self._arousal_hist[i] = self.arousal
+        self._novelty_hist[i] = self.novelty
+        self._crisis_hist[i] = in_crisis
+        self.current_n = n
+        self.in_crisis = in_crisis
         
         return {
             'n_wm': n,
-            'effective_capacity': effective_capacity,
+            'effective_capacity': capacity,
             'energy': energy,
             'valence': self.valence,
             'arousal': self.arousal,
             'in_crisis': in_crisis,
-            'z_score': z_score if in_crisis else 0.0,
-            'report': report
+            'z_score': float(z_score) if in_crisis else 0.0,
+            'report': self.generate_phenomenal_report()
+        }
+    
+    def _store_memories(self, h_global, importance, n):
+        """Append consolidated episodes to the memory arrays"""
+        mem = slice(self._mem_count, self._mem_count + len(h_global))
+        if self._mem_scale is not None:
+            scale = np.abs(h_global).max(axis=1) / 127
+            scale[scale == 0] = 1.0
+            self._mem_scale[mem] = scale
+            h_global = np.rint(h_global / scale[:, None])
+        self._mem_h[mem] = h_global
+        self._mem_importance[mem] = importance
+        self._mem_n[mem] = n
+        self._mem_count = mem.stop
+    
+    def select_dimensionality(self, complexity, in_crisis):
+        """Working-memory dimensionality per episode (branch-free lookup)"""
+        n = self._N_VALUES[np.searchsorted(self._N_THRESHOLDS, complexity, side='right')]
+        return np.where(in_crisis, self._N_CRISIS, n)
+    
+    def process_stage(self, stimuli, complexity, inject_crisis=False):
+        """Process one episode per stimulus
+        
+        complexity and inject_crisis are scalars for the whole stage or one
+        value per episode.
+        """
+        n_eps = len(stimuli)
+        complexity = np.broadcast_to(np.asarray(complexity, dtype=np.float64), (n_eps,))
+        inject_crisis = np.broadcast_to(np.asarray(inject_crisis, dtype=bool), (n_eps,))
+        if n_eps == 0:
+            empty = np.zeros(0)
+            return {
+                'n_wm': np.zeros(0, dtype=np.int64),
+                'effective_capacity': empty,
+                'energy': empty,
+                'valence': empty,
+                'arousal': empty,
+                'in_crisis': np.zeros(0, dtype=bool),
+                'z_score': empty
+            }
+        start = self.episodes
+        self._reserve(start + n_eps)
+        self.episodes += n_eps
+        stage = slice(start, start + n_eps)
+        
+        # Simulate encoding and prediction errors for the whole stage
+        h_global = self.rng.standard_normal((n_eps, self.global_dim)) * complexity[:, None]
+        errors = np.full(n_eps, 10.0)  # Catastrophic under injected crisis
+        normal = ~inject_crisis
+        errors[normal] = np.abs(self.rng.standard_normal(int(normal.sum())) * complexity[normal])
+        
+        # Check for crisis
+        in_crisis, z_scores = self.detect_crisis_batch(errors)
+        
+        # Select dimensionality (maximum during crisis)
+        n = self.select_dimensionality(complexity, in_crisis)
+        counts = np.bincount(n, minlength=16)
+        for level in self.wm_levels:
+            self.n_distribution[level] += int(counts[level])
+        
+        # Energy
+        energies = self.compute_energy(n)
+        
+        # Update affective state (exponential moving averages)
+        rewards = np.where(in_crisis, -0.9, self.rng.standard_normal(n_eps) * 0.1)
+        valence = _ema(rewards, 0.9, 0.1, self.valence)
+        arousal = _ema(errors, 0.8, 0.2, self.arousal)
+        novelty = _ema(complexity, 0.7, 0.3, self.novelty)
+        
+        # Memory consolidation; chunking sees the memories stored before
+        # each episode
+        importance = np.abs(valence) + novelty
+        consolidated = importance > 0.5
+        n_memories = self._mem_count + np.cumsum(consolidated) - consolidated
+        self._store_memories(h_global[consolidated], importance[consolidated],
+                             n[consolidated])
+        
+        # Effective capacity (chunking)
+        capacities = n * np.minimum(1.0 + n_memories / 100.0, 1.75)
+        
+        self._energies[stage] = energies
+        self._capacities[stage] = capacities
+        self._valence_hist[stage] = valence
+        self._arousal_hist[stage] = arousal
+        self._novelty_hist[stage] = novelty
+        self._crisis_hist[stage] = in_crisis
+        self.current_n = int(n[-1])
+        self.in_crisis = bool(in_crisis[-1])
+        self.valence = float(valence[-1])
+        self.arousal = float(arousal[-1])
+        self.novelty = float(novelty[-1])
+        
+        return {
+            'n_wm': n,
+            'effective_capacity': capacities,
+            'energy': energies,
+            'valence': valence,
+            'arousal': arousal,
+            'in_crisis': in_crisis,
+            'z_score': np.where(in_crisis, z_scores, 0.0)
         }
     
     def generate_phenomenal_report(self):
         """Generate phenomenal state description"""
+        return self._phenomenal_report(self.arousal, self.novelty,
+                                       self.valence, self.in_crisis)
+    
+    def phenomenal_report_at(self, episode):
+        """Phenomenal report as it stood after episode (0-based)"""
+        return self._phenomenal_report(float(self._arousal_hist[episode]),
+                                       float(self._novelty_hist[episode]),
+                                       float(self._valence_hist[episode]),
+                                       bool(self._crisis_hist[episode]))
+    
+    @staticmethod
+    def _phenomenal_report(arousal, novelty, valence, in_crisis):
         # Map affective state to phenomenology
-        intensity = min(1.0, self.arousal)
-        clarity = 0.5 + 0.5 * (1.0 - self.novelty)
+        intensity = min(1.0, arousal)
+        clarity = 0.5 + 0.5 * (1.0 - novelty)
         
         return {
             'intensity': intensity,
             'clarity': clarity,
-            'valence': self.valence,
-            'arousal': self.arousal,
+            'valence': valence,
+            'arousal': arousal,
             'flow': 0.5,
             'control': 0.5,
-            'presence': 0.0 if self.in_crisis else 1.0,
+            'presence': 0.0 if in_crisis else 1.0,
             'self_salience': 0.7
         }
     
@@ -163,18 +413,18 @@ class FDQCv4Training:
             'episodes': self.episodes,
             'n_distribution': {k: v for k, v in self.n_distribution.items() if v > 0},
             'capacity': {
-                'initial': float(self.capacities[0]) if self.capacities else 0,
-                'final': float(self.capacities[-1]) if self.capacities else 0,
-                'mean': float(np.mean(self.capacities)) if self.capacities else 0
+                'initial': float(self.capacities[0]) if self.episodes else 0,
+                'final': float(self.capacities[-1]) if self.episodes else 0,
+                'mean': float(self.capacities.mean()) if self.episodes else 0
             },
             'energy': {
-                'total': float(sum(self.energies)),
-                'mean': float(np.mean(self.energies))
+                'total': float(self.energies.sum()),
+                'mean': float(self.energies.mean()) if self.episodes else 0
             },
             'memory': {
-                'episodic_count': len(self.episodic_memories)
+                'episodic_count': self._mem_count
             },
-            'phenomenal_final': self.phenomenal_reports[-1] if self.phenomenal_reports else {}
+            'phenomenal_final': self.phenomenal_report_at(self.episodes - 1) if self.episodes else {}
         }
 
 
@@ -186,55 +436,53 @@ def run_training():
     
     system = FDQCv4Training()
     
+    # Curriculum (episodes, complexity, injected crisis per stage), run as
+    # one batch so all randomness is drawn in a single pass
+    stage_sizes = [40, 30, 30, 10]
+    complexity = np.repeat([0.3, 0.5, 0.7, 1.0], stage_sizes)
+    inject_crisis = np.repeat([False, False, False, True], stage_sizes)
+    
+    # One preallocated stimulus buffer, filled in place; the crisis rows
+    # are scaled in place
+    stim = np.empty((sum(stage_sizes), 784))
+    system.rng.standard_normal(out=stim)
+    stim[-stage_sizes[-1]:] *= 2.0
+    result = system.process_stage(stim, complexity, inject_crisis)
+    
     # Stage 1: Simple tasks
     print("\n[STAGE 1] Simple Tasks (Episodes 1-40)")
     print("-"*70)
-    for i in range(40):
-        stimulus = np.random.randn(784)
-        result = system.process_episode(stimulus, complexity=0.3)
-        
-        if (i+1) % 10 == 0:
-            print(f"  Episode {i+1}: n={result['n_wm']}, "
-                  f"capacity={result['effective_capacity']:.1f}, "
-                  f"valence={result['valence']:.2f}")
+    for i in range(9, 40, 10):
+        print(f"  Episode {i+1}: n={result['n_wm'][i]}, "
+              f"capacity={result['effective_capacity'][i]:.1f}, "
+              f"valence={result['valence'][i]:.2f}")
     
     # Stage 2: Moderate tasks
     print("\n[STAGE 2] Moderate Tasks (Episodes 41-70)")
     print("-"*70)
-    for i in range(40, 70):
-        stimulus = np.random.randn(784)
-        result = system.process_episode(stimulus, complexity=0.5)
-        
-        if (i+1) % 10 == 0:
-            print(f"  Episode {i+1}: n={result['n_wm']}, "
-                  f"capacity={result['effective_capacity']:.1f}, "
-                  f"valence={result['valence']:.2f}")
+    for i in range(49, 70, 10):
+        print(f"  Episode {i+1}: n={result['n_wm'][i]}, "
+              f"capacity={result['effective_capacity'][i]:.1f}, "
+              f"valence={result['valence'][i]:.2f}")
     
     # Stage 3: Complex tasks
     print("\n[STAGE 3] Complex Tasks (Episodes 71-100)")
     print("-"*70)
-    for i in range(70, 100):
-        stimulus = np.random.randn(784)
-        result = system.process_episode(stimulus, complexity=0.7)
-        
-        if (i+1) % 10 == 0:
-            print(f"  Episode {i+1}: n={result['n_wm']}, "
-                  f"capacity={result['effective_capacity']:.1f}, "
-                  f"valence={result['valence']:.2f}")
+    for i in range(79, 100, 10):
+        print(f"  Episode {i+1}: n={result['n_wm'][i]}, "
+              f"capacity={result['effective_capacity'][i]:.1f}, "
+              f"valence={result['valence'][i]:.2f}")
     
     # Stage 4: Epistemic crisis
     print("\n[STAGE 4] Epistemic Crisis (Episodes 101-110)")
     print("-"*70)
     for i in range(100, 110):
-        stimulus = np.random.randn(784) * 2.0
-        result = system.process_episode(stimulus, complexity=1.0, inject_crisis=True)
-        
-        print(f"  Episode {i+1}: n={result['n_wm']}, "
-              f"z_score={result['z_score']:.1f}σ, "
-              f"valence={result['valence']:.2f}")
+        print(f"  Episode {i+1}: n={result['n_wm'][i]}, "
+              f"z_score={result['z_score'][i]:.1f}σ, "
+              f"valence={result['valence'][i]:.2f}")
         
-        if result['in_crisis']:
-            print(f"    ⚠️  CRISIS: Dimensionality escalated to {result['n_wm']}")
+        if result['in_crisis'][i]:
+            print(f"    ⚠️  CRISIS: Dimensionality escalated to {result['n_wm'][i]}")
     
     # Final statistics
     print("\n" + "="*70)
@@ -286,8 +534,14 @@ def run_training():
     print("  ✓ Epistemic Drive (crisis detection)")
     
     # Save results
-    with open('fdqc_v4_training_results.json', 'w') as f:
-        json.dump(stats, f, indent=2)
+    if orjson is not None:
+        with open('fdqc_v4_training_results.json', 'wb') as f:
+            f.write(orjson.dumps(stats, option=orjson.OPT_INDENT_2
+                                 | orjson.OPT_SERIALIZE_NUMPY
+                                 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open('fdqc_v4_training_results.json', 'w') as f:
+            json.dump(stats, f, indent=2)
     
     print("\nResults saved to: fdqc_v4_training_results.json")
     print("\n✅ Training complete!")
@@ -1,16 +1,43 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from functools import lru_cache
+import hashlib
+import json
 import numpy as np
 import sys
 
+from serve import serve
+
+# Optional: orjson serializes the embedding array natively, ~15x faster than jsonify
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+EMBED_DIM = 1024
+EMBED_CACHE_SIZE = 4096
+
 app = Flask(__name__)
 
+def text_seed(text):
+    """Stable 32-bit seed for text (hash() is randomized per process)"""
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=4).digest(), "little")
+
+@lru_cache(maxsize=EMBED_CACHE_SIZE)
+def embedding_json(text):
+    """Serialized embedding response for text (deterministic, so cacheable)"""
+    # Generate deterministic embedding based on text hash
+    rng = np.random.Generator(np.random.PCG64(text_seed(text)))
+    vec = rng.standard_normal(EMBED_DIM)
+    if orjson is not None:
+        return orjson.dumps({"embedding": vec}, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps({"embedding": vec.tolist()}).encode()
+
 @app.post("/embed")
 def embed():
     text = request.json.get("text", "")
-    # Generate deterministic embedding based on text hash
-    rng = np.random.default_rng(abs(hash(text)) % (2**32))
-    vec = rng.standard_normal(1024).tolist()
-    return jsonify({"embedding": vec})
+    # lru_cache is thread-safe; concurrent misses on one text just compute
+    # the same bytes twice
+    return Response(embedding_json(text), mimetype="application/json")
 
 @app.get("/health")
 def health():
@@ -18,4 +45,4 @@ def health():
 
 if __name__ == "__main__":
     print("🧮 Embedding service starting on http://0.0.0.0:8081", file=sys.stderr, flush=True)
-    app.run(host="0.0.0.0", port=8081, debug=False)
+    serve(app, port=8081)
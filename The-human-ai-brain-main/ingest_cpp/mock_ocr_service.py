@@ -1,5 +1,9 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, jsonify
+import itertools
 import sys
+import threading
+
+from serve import serve
 
 app = Flask(__name__)
 
@@ -104,31 +108,35 @@ content, and output is initially empty for unsupervised extraction.
 - Integration overhead: Minimal (~5-10ms per query)"""
 ]
 
-page_counter = 0
+def jsonify_bytes(obj):
+    """The exact body jsonify sends for obj"""
+    with app.app_context():
+        return jsonify(obj).get_data()
+
+# Response bodies are static, so serialize them once at import; each
+# request just takes the next body in the cycle
+RESPONSE_BODIES = [
+    jsonify_bytes({"choices": [{"message": {"content": content}}]})
+    for content in MOCK_RESPONSES
+]
+MODELS_BODY = jsonify_bytes({"data": [{"id": "mock-ocr"}]})
+
+# Under gunicorn each worker process rotates through the pages on its own
+_body_cycle = itertools.cycle(RESPONSE_BODIES)
+_cycle_lock = threading.Lock()
 
 @app.post("/v1/chat/completions")
 def chat_completions():
-    global page_counter
-    data = request.json
-    
-    # Return mock markdown for the page (cycle through responses)
-    content = MOCK_RESPONSES[page_counter % len(MOCK_RESPONSES)]
-    page_counter += 1
-    
-    return jsonify({
-        "choices": [{
-            "message": {
-                "content": content
-            }
-        }]
-    })
+    # Return mock markdown for the page (cycle through responses); the
+    # request body (a base64 page image) is never needed, so it isn't parsed
+    with _cycle_lock:
+        body = next(_body_cycle)
+    return Response(body, mimetype="application/json")
 
 @app.get("/v1/models")
 def models():
-    return jsonify({
-        "data": [{"id": "mock-ocr"}]
-    })
+    return Response(MODELS_BODY, mimetype="application/json")
 
 if __name__ == "__main__":
     print("🔍 Mock OCR service starting on http://0.0.0.0:8000", file=sys.stderr, flush=True)
-    app.run(host="0.0.0.0", port=8000, debug=False)
+    serve(app, port=8000)
@@ -0,0 +1,47 @@
+"""Serve the ingest stub services (embed_service, mock_ocr_service)
+
+Uses gunicorn with forked gthread workers when it is installed, otherwise
+falls back to the threaded Flask development server.
+"""
+import multiprocessing
+import os
+import sys
+
+# Optional: gunicorn (POSIX only) for multi-process serving
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
+def default_workers():
+    """Worker processes: $WEB_CONCURRENCY, else one per core up to 4"""
+    return int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count(), 4)))
+
+if BaseApplication is not None:
+    class StandaloneApplication(BaseApplication):
+        """Run a WSGI app under gunicorn from inside a script"""
+        def __init__(self, app, options):
+            self.application = app
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+def serve(app, port, workers=None, threads=4):
+    if BaseApplication is None:
+        print("⚠️  gunicorn not installed, using the Flask development server",
+              file=sys.stderr, flush=True)
+        app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
+        return
+
+    StandaloneApplication(app, {
+        "bind": f"0.0.0.0:{port}",
+        "workers": workers or default_workers(),
+        "worker_class": "gthread",
+        "threads": threads,
+    }).run()
@@ -1,25 +1,43 @@
 #!/usr/bin/env python3
 """Simple Python client to test the Brain gRPC server."""
 
+import atexit
+import os
 import grpc
 import sys
 import json
+import traceback
+import numpy as np
 
 # We need to generate the Python gRPC stubs from proto first
 # For now, let's use grpc_cli or manual testing
+try:
+    import brain_pb2
+    import brain_pb2_grpc
+except ImportError as e:
+    print(f"Error: generated gRPC stubs not importable ({e})")
+    sys.exit(2)
+
+# Channel settings mirror brain-ai/grpc_channel.py (kept in sync by hand:
+# this tree ships on its own and cannot import from brain-ai/).
+# BRAIN_GRPC_TARGET may name a unix: socket instead of the TCP port
+_TARGET = os.environ.get('BRAIN_GRPC_TARGET', 'localhost:50051')
+_CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 10000),
+    ('grpc.http2.max_frame_size', 1 << 20),
+    ('grpc.max_send_message_length', 1 << 25),
+]
+
+# One channel and stub shared by all tests
+_CHANNEL = grpc.insecure_channel(_TARGET, options=_CHANNEL_OPTIONS)
+_STUB = brain_pb2_grpc.BrainStub(_CHANNEL)
+atexit.register(_CHANNEL.close)
 
 def test_health():
     """Test the Health endpoint."""
-    channel = grpc.insecure_channel('localhost:50051')
-    
-    # Import the generated proto files
     try:
-        import brain_pb2
-        import brain_pb2_grpc
-        
-        stub = brain_pb2_grpc.BrainStub(channel)
         request = brain_pb2.HealthReq()
-        response = stub.Health(request)
+        response = _STUB.Health(request)
         
         print("✓ Health Check:")
         print(f"  Status: {response.status}")
@@ -32,21 +50,12 @@ def test_health():
 
 def test_step():
     """Test the Step endpoint with random input."""
-    import numpy as np
-    
-    channel = grpc.insecure_channel('localhost:50051')
-    
     try:
-        import brain_pb2
-        import brain_pb2_grpc
-        
-        stub = brain_pb2_grpc.BrainStub(channel)
-        
         # Create MNIST-like input (28x28 = 784 dimensions)
         input_vec = np.random.rand(784).tolist()
         
         request = brain_pb2.StepReq(input=input_vec)
-        response = stub.Step(request)
+        response = _STUB.Step(request)
         
         print("\n✓ Cognitive Step:")
         print(f"  WM Dimension: {len(response.h_wm)}")
@@ -63,21 +72,14 @@ def test_step():
         return True
     except Exception as e:
         print(f"Error: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
 def test_get_state():
     """Test the GetState endpoint."""
-    channel = grpc.insecure_channel('localhost:50051')
-    
     try:
-        import brain_pb2
-        import brain_pb2_grpc
-        
-        stub = brain_pb2_grpc.BrainStub(channel)
         request = brain_pb2.StateReq()
-        response = stub.GetState(request)
+        response = _STUB.GetState(request)
         
         print("\n✓ Quantum State:")
         print(f"  Dimension: {response.dimension}")
@@ -89,7 +91,6 @@ def test_get_state():
         return True
     except Exception as e:
         print(f"Error: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
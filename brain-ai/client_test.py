@@ -1,91 +1,115 @@
 #!/usr/bin/env python3
 """Simple test client for Brain-AI gRPC server"""
-import grpc
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
 import brain_pb2
 import brain_pb2_grpc
+from grpc_channel import open_channel
 
-def test_health():
-    print("\n🔍 Testing HealthCheck...")
-    with grpc.insecure_channel('localhost:50051') as channel:
-        stub = brain_pb2_grpc.BrainStub(channel)
-        try:
-            response = stub.HealthCheck(brain_pb2.HealthReq())
-            print(f"✅ Status: {response.status}")
-            print(f"   Version: {response.version}")
-            print(f"   Uptime: {response.uptime_ms}ms")
-            return True
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return False
+# One channel and stub shared by all tests
+_CHANNEL = open_channel()
+_STUB = brain_pb2_grpc.BrainStub(_CHANNEL)
 
-def test_step():
-    print("\n🔍 Testing Step...")
-    with grpc.insecure_channel('localhost:50051') as channel:
-        stub = brain_pb2_grpc.BrainStub(channel)
-        try:
-            input_vec = [0.1] * 784
-            response = stub.Step(brain_pb2.StepReq(input=input_vec, reward=0.0))
-            print(f"✅ Entropy: {response.entropy:.4f}")
-            print(f"   Total collapses: {response.total_collapses}")
-            return True
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return False
+# Constant request payloads: the repeated fields are converted into
+# protobuf storage once here instead of on every call
+_STEP_REQ = brain_pb2.StepReq(input=[0.1] * 784, reward=0.0)
+_RECALL_REQ = brain_pb2.RecallReq(query=[0.5] * 384, topk=5, use_graph=True)
 
-def test_upsert():
-    print("\n🔍 Testing Upsert...")
-    with grpc.insecure_channel('localhost:50051') as channel:
-        stub = brain_pb2_grpc.BrainStub(channel)
-        try:
-            vectors = [brain_pb2.EmbedVector(data=[float(i)/100] * 384) for i in range(3)]
-            response = stub.Upsert(brain_pb2.UpsertReq(ids=[1, 2, 3], vectors=vectors))
-            print(f"✅ Upserted {response.count} vectors")
-            return True
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return False
+# 3 test vectors (row i filled with i/100)
+_UPSERT_REQ = brain_pb2.UpsertReq(
+    ids=[1, 2, 3],
+    vectors=[brain_pb2.EmbedVector(data=[i / 100] * 384) for i in range(3)]
+)
 
-def test_recall():
-    print("\n🔍 Testing Recall...")
-    with grpc.insecure_channel('localhost:50051') as channel:
-        stub = brain_pb2_grpc.BrainStub(channel)
-        try:
-            query = [0.5] * 384
-            response = stub.Recall(brain_pb2.RecallReq(query=query, topk=5, use_graph=True))
-            print(f"✅ Retrieved {len(response.ids)} results")
-            if response.ids:
-                print(f"   Top IDs: {list(response.ids[:3])}")
-            return True
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return False
+def test_health(out=None):
+    print("\n🔍 Testing HealthCheck...", file=out)
+    try:
+        response = _STUB.HealthCheck(brain_pb2.HealthReq())
+        print(f"✅ Status: {response.status}", file=out)
+        print(f"   Version: {response.version}", file=out)
+        print(f"   Uptime: {response.uptime_ms}ms", file=out)
+        return True
+    except Exception as e:
+        print(f"❌ Error: {e}", file=out)
+        return False
 
-def test_stats():
-    print("\n🔍 Testing GetStats...")
-    with grpc.insecure_channel('localhost:50051') as channel:
-        stub = brain_pb2_grpc.BrainStub(channel)
-        try:
-            response = stub.GetStats(brain_pb2.StatsReq())
-            print(f"✅ Entropy: {response.entropy:.4f}")
-            print(f"   Dimension: {response.dimension}")
-            print(f"   Memory: {response.memory_stats.total_items} items")
-            print(f"   Graph: {response.graph_stats.nodes} nodes, {response.graph_stats.edges} edges")
-            return True
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return False
+def test_step(out=None):
+    print("\n🔍 Testing Step...", file=out)
+    try:
+        response = _STUB.Step(_STEP_REQ)
+        print(f"✅ Entropy: {response.entropy:.4f}", file=out)
+        print(f"   Total collapses: {response.total_collapses}", file=out)
+        return True
+    except Exception as e:
+        print(f"❌ Error: {e}", file=out)
+        return False
+
+def test_upsert(out=None):
+    print("\n🔍 Testing Upsert...", file=out)
+    try:
+        response = _STUB.Upsert(_UPSERT_REQ)
+        print(f"✅ Upserted {response.count} vectors", file=out)
+        return True
+    except Exception as e:
+        print(f"❌ Error: {e}", file=out)
+        return False
+
+def test_recall(out=None):
+    print("\n🔍 Testing Recall...", file=out)
+    try:
+        response = _STUB.Recall(_RECALL_REQ)
+        print(f"✅ Retrieved {len(response.ids)} results", file=out)
+        if response.ids:
+            print(f"   Top IDs: {list(response.ids[:3])}", file=out)
+        return True
+    except Exception as e:
+        print(f"❌ Error: {e}", file=out)
+        return False
+
+def test_stats(out=None):
+    print("\n🔍 Testing GetStats...", file=out)
+    try:
+        response = _STUB.GetStats(brain_pb2.StatsReq())
+        print(f"✅ Entropy: {response.entropy:.4f}", file=out)
+        print(f"   Dimension: {response.dimension}", file=out)
+        print(f"   Memory: {response.memory_stats.total_items} items", file=out)
+        print(f"   Graph: {response.graph_stats.nodes} nodes, {response.graph_stats.edges} edges", file=out)
+        return True
+    except Exception as e:
+        print(f"❌ Error: {e}", file=out)
+        return False
+
+def run_concurrently(tests):
+    """Run independent tests in parallel on the shared channel; each test
+    prints into its own buffer, reported in the given order"""
+    with ThreadPoolExecutor(max_workers=len(tests)) as pool:
+        futures = []
+        for name, test in tests:
+            buf = io.StringIO()
+            futures.append((name, buf, pool.submit(test, buf)))
+        results = []
+        for name, buf, future in futures:
+            passed = future.result()
+            sys.stdout.write(buf.getvalue())
+            results.append((name, passed))
+    return results
 
 if __name__ == '__main__':
     print("🧠 Brain-AI v3.6.0 - gRPC Client Test")
     print("=" * 50)
     
-    results = [
-        ('HealthCheck', test_health()),
-        ('Step', test_step()),
-        ('Upsert', test_upsert()),
-        ('Recall', test_recall()),
-        ('GetStats', test_stats()),
-    ]
+    # Recall and GetStats observe what Step/Upsert wrote, so they run as a
+    # second wave
+    results = run_concurrently([
+        ('HealthCheck', test_health),
+        ('Step', test_step),
+        ('Upsert', test_upsert),
+    ])
+    results += run_concurrently([
+        ('Recall', test_recall),
+        ('GetStats', test_stats),
+    ])
     
     print("\n" + "=" * 50)
     print("📊 Test Summary:")
@@ -0,0 +1,30 @@
+"""Shared gRPC channel setup for the Brain-AI test clients
+
+The-human-ai-brain-main/test_client.py carries a copy of these settings;
+update both together.
+"""
+import atexit
+import os
+import grpc
+
+# Server address; set BRAIN_GRPC_TARGET=unix:/path/to.sock to skip TCP
+# loopback when the server binds a Unix-domain socket
+TARGET = os.environ.get('BRAIN_GRPC_TARGET', 'localhost:50051')
+
+# Keepalive keeps the connection READY between calls; larger HTTP/2 frames
+# and message limits keep multi-vector payloads from stalling
+CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 10000),
+    ('grpc.http2.max_frame_size', 1 << 20),
+    ('grpc.max_send_message_length', 1 << 25),
+]
+
+def open_channel():
+    """Channel to share across all calls of a run, closed at exit
+
+    Connects lazily on the first RPC; every later call reuses the same
+    HTTP/2 connection.
+    """
+    channel = grpc.insecure_channel(TARGET, options=CHANNEL_OPTIONS)
+    atexit.register(channel.close)
+    return channel